@@ -0,0 +1,27 @@
+# Gunicorn settings for Render (loaded automatically from the working directory).
+# Start command: gunicorn server:app
+import multiprocessing
+import os
+
+# Threaded workers so one slow request doesn't block the whole worker.
+# Each worker holds its own Postgres pool, so keep PG_POOL_MAX >= threads + 2
+# (server.IMAGE_WORKERS background resize threads share it)
+# and workers * PG_POOL_MAX under the database's connection limit.
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), 4)))
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+# Reuse client connections between requests
+keepalive = 30
+
+# Import the app (schema setup + seed) once in the master, then fork workers
+# that share the loaded code copy-on-write.
+preload_app = True
+
+
+def when_ready(arbiter):
+    # The master's startup connections must not leak into forked workers;
+    # each worker opens its own pool on first request.
+    import server as app_module
+
+    app_module.close_pool()
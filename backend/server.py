@@ -1,16 +1,27 @@
 from __future__ import annotations
 
-import json
+import atexit
 import os
+import threading
+import time
 import uuid
 import io
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import date as Date
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import orjson
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import connection as PGConnection
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from flask import Flask, jsonify, request, Response
+from flask.json.provider import DefaultJSONProvider
+from flask_caching import Cache
 from flask_cors import CORS
 
 # Pillow (for resize/compress). Add Pillow to requirements.txt on Render.
@@ -20,8 +31,36 @@ except Exception:  # Pillow not installed
     Image = None  # type: ignore
     ImageOps = None  # type: ignore
 
+# libvips (faster, lower-memory thumbnails). Pillow is the fallback when it's missing.
+try:
+    import pyvips
+except Exception:  # pyvips / libvips not installed
+    pyvips = None  # type: ignore
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson (faster encode/decode than stdlib json).
+    Responses are always compact and keep dict insertion order.
+    """
+
+    sort_keys = False
+    compact = True
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        # orjson bytes go straight into the body (no str round trip, no debug indent)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default), mimetype=self.mimetype)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
 # ----------------------------
@@ -34,11 +73,69 @@ SEED_PATH = os.path.join(DATA_DIR, "seed.json")
 PAGE_SIZE_DEFAULT = 10
 PAGE_SIZE_MAX = 50
 
+# Explicit per-system grade sorts: the list is restricted to that grade system
+GRADE_SORT_SYSTEMS = {"yds_asc": "YDS", "yds_desc": "YDS", "v_asc": "V", "v_desc": "V"}
+
+# Connection pool bounds (max should cover gunicorn threads per worker)
+PG_POOL_MIN = 2
+PG_POOL_MAX = int(os.environ.get("PG_POOL_MAX", "10"))
+# Seconds libpq waits for a new connection; an unreachable host fails fast instead of hanging
+PG_CONNECT_TIMEOUT = 5
+
+# Opt-in: let commits return before the WAL flush. A crash can lose the last
+# few acknowledged writes (it never corrupts data). Off by default.
+PG_ASYNC_COMMIT = os.environ.get("PG_ASYNC_COMMIT", "").strip().lower() in ("1", "true", "yes", "on")
+
+# Skip schema setup + seeding at import (tests, tooling, one-off scripts)
+SKIP_DB_INIT = os.environ.get("SKIP_DB_INIT", "").strip().lower() in ("1", "true", "yes", "on")
+
+# Advisory lock key serializing init_db/seed across processes and instances
+_INIT_LOCK_KEY = 0x636C6D62  # "clmb"
+
 # ----------------------------
 # Image upload rules (uploads only)
 # ----------------------------
 MAX_IMAGE_BYTES = 5 * 1024 * 1024  # 5 MB
 ALLOWED_IMAGE_MIMES = {"image/jpeg", "image/png", "image/gif"}
+IMAGE_MAX_SIDE = 800  # stored images are resized so the longest side fits
+IMAGE_PASSTHROUGH_BYTES = 400 * 1024  # smaller uploads that already fit are stored untouched
+IMAGE_CHUNK_BYTES = 64 * 1024  # response write size for stored images
+IMAGE_WORKERS = 2  # background resize threads per process (each borrows a pooled connection)
+
+# ----------------------------
+# Log fields (API names, all required)
+# ----------------------------
+LOG_FIELDS = ("date", "environment", "location", "routeName", "climbType", "gradeSystem", "grade", "progress")
+
+# Allowed values (frozensets: membership checks are a single hash lookup)
+ENVIRONMENTS = frozenset(("gym", "outdoor"))
+CLIMB_TYPES = frozenset(("top-rope", "sport", "trad", "boulder"))
+PROGRESS_VALUES = frozenset(("complete", "incomplete"))
+
+# ----------------------------
+# Read cache (list, stats and single-log responses)
+# ----------------------------
+CACHE_TTL_SECONDS = 30
+# Only enabled with REDIS_URL: every gunicorn worker then shares one cache and one data
+# version, so a write invalidates all of them. A per-process cache would let other workers
+# serve pre-write data right after a save, so without Redis reads always hit Postgres.
+REDIS_URL = os.environ.get("REDIS_URL", "").strip()
+REDIS_SOCKET_TIMEOUT = 0.2  # seconds; an unreachable Redis costs this much, then reads go to Postgres
+if REDIS_URL:
+    import redis
+
+    _CACHE_CONFIG: Dict[str, Any] = {
+        "CACHE_TYPE": "RedisCache",
+        # Client built here: with CACHE_REDIS_URL, flask-caching ignores CACHE_OPTIONS (no timeouts)
+        "CACHE_REDIS_HOST": redis.Redis.from_url(
+            REDIS_URL, socket_connect_timeout=REDIS_SOCKET_TIMEOUT, socket_timeout=REDIS_SOCKET_TIMEOUT
+        ),
+        "CACHE_KEY_PREFIX": "climblog:",
+    }
+else:
+    _CACHE_CONFIG = {"CACHE_TYPE": "NullCache"}
+cache = Cache(app, config={"CACHE_DEFAULT_TIMEOUT": CACHE_TTL_SECONDS, **_CACHE_CONFIG})
+_DATA_VERSION_KEY = "data_version"  # Redis counter (INCR, no TTL); part of each cache key
 
 
 # ----------------------------
@@ -50,35 +147,78 @@ def _parse_csv(arg: Optional[str]) -> List[str]:
     return [x.strip() for x in arg.split(",") if x.strip()]
 
 
-def _yds_key(g: str) -> int:
+def _int_arg(name: str, default: int) -> int:
     """
-    Map YDS grades like "5.2".."5.15" to integers 502..515
+    Non-negative integer query arg; missing or malformed values give default (no 500, no raise).
     """
+    v = (request.args.get(name) or "").strip()
+    # ASCII digits only (isdigit alone accepts "²"); 9 digits keeps OFFSET inside BIGINT
+    if v.isascii() and v.isdigit() and len(v) <= 9:
+        return int(v)
+    return default
+
+
+def _parse_cursor(raw: str) -> Optional[Tuple[Date, str]]:
+    """
+    Parse a "<YYYY-MM-DD>|<id>" keyset cursor (as returned in nextCursor).
+    Returns (date, id), or None when malformed.
+    """
+    date_str, sep, log_id = raw.partition("|")
+    if not sep or not log_id:
+        return None
+    # Same shape check as validate_payload: fromisoformat alone accepts "2024-W01-1" etc.
+    if len(date_str) != 10 or date_str[4] != "-" or date_str[7] != "-":
+        return None
     try:
-        s = g.strip().lower()
-        if not s.startswith("5."):
-            return -1
-        num = s.split("5.", 1)[1]
-        num = "".join(ch for ch in num if ch.isdigit())
-        return 500 + int(num)
-    except Exception:
+        return Date.fromisoformat(date_str), log_id
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=64)
+def _yds_key(g: str) -> int:
+    """
+    Map YDS grades like "5.2".."5.15" to integers 502..515 (letter suffixes ignored)
+    """
+    s = g.strip()
+    if len(s) < 3 or s[0] != "5" or s[1] != ".":
+        return -1
+    # Single index scan over the leading digits; no per-call generator or lower()
+    i, n = 2, len(s)
+    while i < n and "0" <= s[i] <= "9":
+        i += 1
+    if i == 2:
         return -1
+    return 500 + int(s[2:i])
 
 
+@lru_cache(maxsize=64)
 def _v_key(g: str) -> int:
     """
     Map V grades like "V0".."V17" to integers 0..17
     """
-    try:
-        s = g.strip().upper()
-        if not s.startswith("V"):
-            return -1
-        return int(s[1:])
-    except Exception:
+    s = g.strip()
+    if len(s) < 2 or (s[0] != "V" and s[0] != "v"):
         return -1
+    for ch in s[1:]:
+        if not "0" <= ch <= "9":
+            return -1
+    return int(s[1:])
+
+
+# The grades the UI offers (plus the 5.10a-5.15d letter grades in the seed data), precomputed
+_GRADE_TABLE: Dict[Tuple[str, str], int] = {
+    **{("V", f"V{n}"): n for n in range(18)},
+    **{("YDS", f"5.{n}"): 500 + n for n in range(2, 16)},
+    **{("YDS", f"5.{n}{s}"): 500 + n for n in range(10, 16) for s in "abcd"},
+}
 
 
 def _grade_key(grade_system: str, grade: str) -> int:
+    k = _GRADE_TABLE.get((grade_system, grade))
+    if k is not None:
+        return k
+    # Anything else (lowercase v, "5.9+", stray spaces) goes through the cached parsers
     if grade_system == "YDS":
         return _yds_key(grade)
     if grade_system == "V":
@@ -86,6 +226,50 @@ def _grade_key(grade_system: str, grade: str) -> int:
     return -1
 
 
+def _cache_key() -> Optional[str]:
+    """
+    Cache key for the current GET, or None to bypass the cache (no Redis, or unreachable).
+    Taken before querying, so a read racing a write is stored under the old version.
+    """
+    if not REDIS_URL:
+        return None
+    try:
+        version = int(cache.get(_DATA_VERSION_KEY) or 0)
+    except Exception as e:
+        app.logger.warning("Cache unavailable: %s", e)
+        return None
+    return f"v{version}:{request.full_path}"
+
+
+def _cache_get(key: Optional[str]) -> Optional[Dict[str, Any]]:
+    if key is None:
+        return None
+    try:
+        return cache.get(key)
+    except Exception as e:
+        app.logger.warning("Cache read failed: %s", e)
+        return None
+
+
+def _cache_put(key: Optional[str], payload: Dict[str, Any]) -> None:
+    if key is None:
+        return
+    try:
+        cache.set(key, payload)
+    except Exception as e:
+        app.logger.warning("Cache write failed: %s", e)
+
+
+def _bump_data_version() -> None:
+    if not REDIS_URL:
+        return
+    try:
+        # Backend INCR: atomic across workers; old entries simply age out
+        cache.cache.inc(_DATA_VERSION_KEY)
+    except Exception as e:
+        app.logger.error("Cache invalidation failed (reads may be stale up to %ss): %s", CACHE_TTL_SECONDS, e)
+
+
 def get_db_url() -> str:
     url = os.environ.get("DATABASE_URL", "").strip()
     if not url:
@@ -93,9 +277,114 @@ def get_db_url() -> str:
     return url
 
 
-def get_conn():
-    # Render provides a Postgres URL; psycopg2 can connect directly with it.
-    return psycopg2.connect(get_db_url(), cursor_factory=RealDictCursor)
+class _PooledConnection(PGConnection):
+    """
+    Connection that remembers which server-side prepared statements it holds.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.prepared: set = set()
+
+
+# Fixed-shape statements worth preparing once per connection ($n placeholders)
+_PREPARED_SQL: Dict[str, str] = {
+    "get_log_ps": """
+    SELECT
+      id, date, environment, location, route_name, climb_type, grade_system, grade, progress,
+      (image_mime IS NOT NULL) AS has_image
+    FROM climb_logs
+    WHERE id = $1
+    """,
+    "delete_log_ps": "DELETE FROM climb_logs WHERE id = $1",
+    "image_meta_ps": (
+        "SELECT image_etag, image_mime, image_status FROM climb_logs WHERE id = $1 AND image_data IS NOT NULL"
+    ),
+    # NOT DISTINCT so rows written before image_etag existed (NULL) still match
+    "image_data_ps": "SELECT image_data FROM climb_logs WHERE id = $1 AND image_etag IS NOT DISTINCT FROM $2",
+    "insert_log_ps": """
+    INSERT INTO climb_logs
+      (id, date, environment, location, route_name, climb_type, grade_system, grade, grade_key, progress,
+       image_data, image_mime, image_filename, image_etag, image_status)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
+    """,
+}
+
+_POOL: Optional[ThreadedConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    """
+    Create the pool on first use so importing the module never needs DATABASE_URL.
+    """
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                extra: Dict[str, Any] = {}
+                if PG_ASYNC_COMMIT:
+                    extra["options"] = "-c synchronous_commit=off"
+                # Render provides a Postgres URL; psycopg2 can connect directly with it.
+                _POOL = ThreadedConnectionPool(
+                    minconn=PG_POOL_MIN,
+                    maxconn=PG_POOL_MAX,
+                    dsn=get_db_url(),
+                    connection_factory=_PooledConnection,
+                    cursor_factory=RealDictCursor,
+                    connect_timeout=PG_CONNECT_TIMEOUT,
+                    **extra,
+                )
+    return _POOL
+
+
+def close_pool() -> None:
+    """
+    Close all pooled connections; the next get_conn() opens a fresh pool.
+    Gunicorn's master calls this after preloading so forked workers never share sockets.
+    """
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.closeall()
+            _POOL = None
+
+
+atexit.register(close_pool)
+
+
+@contextmanager
+def get_conn() -> Iterator[Any]:
+    """
+    Borrow a pooled connection. Commits on success, rolls back on error,
+    and always hands the connection back to the pool.
+    """
+    pool = _get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        # A dropped connection can't roll back; let the original error through
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        # Broken connections are discarded so the next borrower gets a live one
+        pool.putconn(conn, close=bool(conn.closed))
+
+
+def execute_prepared(cur: Any, name: str, params: List[Any]) -> None:
+    """
+    EXECUTE a statement from _PREPARED_SQL, preparing it on first use per connection.
+    Prepared statements outlive transactions, so this happens once per connection.
+    """
+    conn = cur.connection
+    if name not in conn.prepared:
+        cur.execute(f"PREPARE {name} AS {_PREPARED_SQL[name]};")
+        conn.prepared.add(name)
+    placeholders = ", ".join(["%s"] * len(params))
+    cur.execute(f"EXECUTE {name} ({placeholders});", params)
 
 
 def init_db() -> None:
@@ -119,12 +408,122 @@ def init_db() -> None:
         "ALTER TABLE climb_logs ADD COLUMN IF NOT EXISTS image_data BYTEA NULL;",
         "ALTER TABLE climb_logs ADD COLUMN IF NOT EXISTS image_mime TEXT NULL;",
         "ALTER TABLE climb_logs ADD COLUMN IF NOT EXISTS image_filename TEXT NULL;",
+        # Stored at write time so conditional image GETs never read or hash the BYTEA
+        "ALTER TABLE climb_logs ADD COLUMN IF NOT EXISTS image_etag TEXT NULL;",
+        "UPDATE climb_logs SET image_etag = md5(image_data) WHERE image_data IS NOT NULL AND image_etag IS NULL;",
+        # 'pending' = raw upload stored, background resize not done yet
+        "ALTER TABLE climb_logs ADD COLUMN IF NOT EXISTS image_status TEXT NULL;",
+        # Images stored before the column existed were already resized at upload
+        "UPDATE climb_logs SET image_status = 'ready' WHERE image_data IS NOT NULL AND image_status IS NULL;",
+        # Lowercased search blob kept by Postgres, so q is one LIKE per row instead of two ILIKEs
+        (
+            "ALTER TABLE climb_logs ADD COLUMN IF NOT EXISTS search_text TEXT "
+            "GENERATED ALWAYS AS (lower(route_name || E'\\n' || location)) STORED;"
+        ),
+    ]
+    # Indexes for the list_logs filters/sorts
+    index_sql = [
+        # (date, id) matches the date_desc sort and its keyset cursor
+        "CREATE INDEX IF NOT EXISTS climb_logs_date_id_idx ON climb_logs (date DESC, id DESC);",
+        "CREATE INDEX IF NOT EXISTS climb_logs_gradekey_idx ON climb_logs (grade_system, grade_key);",
+        "CREATE INDEX IF NOT EXISTS climb_logs_env_idx ON climb_logs (environment);",
+        "CREATE INDEX IF NOT EXISTS climb_logs_type_idx ON climb_logs (climb_type);",
+        "CREATE INDEX IF NOT EXISTS climb_logs_progress_idx ON climb_logs (progress);",
+        # route/location sorts read these in order instead of sorting the table
+        "CREATE INDEX IF NOT EXISTS climb_logs_route_idx ON climb_logs (route_name);",
+        "CREATE INDEX IF NOT EXISTS climb_logs_location_idx ON climb_logs (location);",
+        # Worker startup sweep for resizes a restart dropped; stays tiny (pending rows only)
+        "CREATE INDEX IF NOT EXISTS climb_logs_image_pending_idx ON climb_logs (id) WHERE image_status = 'pending';",
     ]
+    # Trigram GIN serves LIKE '%q%'. pg_trgm is contrib and may be missing, so this part
+    # is best-effort: without it search still works, just without an index.
+    trgm_sql = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+        "CREATE INDEX IF NOT EXISTS climb_logs_search_trgm ON climb_logs USING gin (search_text gin_trgm_ops);",
+    ]
+    # /api/stats reads per-type counters that statement triggers keep current: each write
+    # statement applies one grouped delta from its transition tables, whatever its row count
+    stats_sql = """
+    CREATE TABLE IF NOT EXISTS climb_log_type_counts (
+      climb_type TEXT PRIMARY KEY,
+      total BIGINT NOT NULL DEFAULT 0,
+      complete BIGINT NOT NULL DEFAULT 0
+    );
+    CREATE OR REPLACE FUNCTION climb_logs_count_trg() RETURNS trigger AS $$
+    BEGIN
+      -- Transition tables only exist for the trigger's own event, hence one query per TG_OP
+      IF TG_OP = 'INSERT' THEN
+        INSERT INTO climb_log_type_counts AS c (climb_type, total, complete)
+        SELECT climb_type, COUNT(*), COUNT(*) FILTER (WHERE progress = 'complete')
+        FROM new_rows
+        GROUP BY climb_type
+        ON CONFLICT (climb_type) DO UPDATE
+        SET total = c.total + EXCLUDED.total, complete = c.complete + EXCLUDED.complete;
+      ELSIF TG_OP = 'DELETE' THEN
+        UPDATE climb_log_type_counts AS c
+        SET total = c.total - d.total, complete = c.complete - d.complete
+        FROM (
+          SELECT climb_type, COUNT(*) AS total, COUNT(*) FILTER (WHERE progress = 'complete') AS complete
+          FROM old_rows
+          GROUP BY climb_type
+        ) AS d
+        WHERE c.climb_type = d.climb_type;
+      ELSE
+        -- Image/route edits leave every delta at zero and touch no counter row
+        INSERT INTO climb_log_type_counts AS c (climb_type, total, complete)
+        SELECT climb_type, SUM(dt), SUM(dc)
+        FROM (
+          SELECT climb_type, 1 AS dt, (progress = 'complete')::int AS dc FROM new_rows
+          UNION ALL
+          SELECT climb_type, -1, -(progress = 'complete')::int FROM old_rows
+        ) AS x
+        GROUP BY climb_type
+        HAVING SUM(dt) <> 0 OR SUM(dc) <> 0
+        ON CONFLICT (climb_type) DO UPDATE
+        SET total = c.total + EXCLUDED.total, complete = c.complete + EXCLUDED.complete;
+      END IF;
+      RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    -- Triggers and the one full count are created together, the first time only; the lock
+    -- holds off writes until the counts and the triggers agree
+    DO $$
+    BEGIN
+      IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgrelid = 'climb_logs'::regclass AND tgname = 'climb_logs_count_ins'
+      ) THEN
+        LOCK TABLE climb_logs IN SHARE ROW EXCLUSIVE MODE;
+        CREATE TRIGGER climb_logs_count_ins AFTER INSERT ON climb_logs
+          REFERENCING NEW TABLE AS new_rows
+          FOR EACH STATEMENT EXECUTE FUNCTION climb_logs_count_trg();
+        CREATE TRIGGER climb_logs_count_upd AFTER UPDATE ON climb_logs
+          REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+          FOR EACH STATEMENT EXECUTE FUNCTION climb_logs_count_trg();
+        CREATE TRIGGER climb_logs_count_del AFTER DELETE ON climb_logs
+          REFERENCING OLD TABLE AS old_rows
+          FOR EACH STATEMENT EXECUTE FUNCTION climb_logs_count_trg();
+        DELETE FROM climb_log_type_counts;
+        INSERT INTO climb_log_type_counts (climb_type, total, complete)
+        SELECT climb_type, COUNT(*), COUNT(*) FILTER (WHERE progress = 'complete')
+        FROM climb_logs
+        GROUP BY climb_type;
+      END IF;
+    END;
+    $$;
+    """
+    # No parameters, so the whole script goes to the server in a single round trip
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(create_sql)
-            for s in alter_sql:
-                cur.execute(s)
+            # Concurrent starters (workers, instances during a deploy) run the DDL one at a time
+            cur.execute("SELECT pg_advisory_xact_lock(%s);", [_INIT_LOCK_KEY])
+            cur.execute("\n".join([create_sql, *alter_sql, *index_sql, stats_sql]))
+            cur.execute("SAVEPOINT trgm;")
+            try:
+                cur.execute("\n".join(trgm_sql))
+            except psycopg2.Error as e:
+                cur.execute("ROLLBACK TO SAVEPOINT trgm;")
+                app.logger.warning("Trigram search index skipped: %s", e)
 
 
 def seed_db_if_empty() -> None:
@@ -136,13 +535,15 @@ def seed_db_if_empty() -> None:
 
     with get_conn() as conn:
         with conn.cursor() as cur:
+            # Only one process may see the table empty and seed it
+            cur.execute("SELECT pg_advisory_xact_lock(%s);", [_INIT_LOCK_KEY])
             cur.execute("SELECT COUNT(*) AS n FROM climb_logs;")
             n = int(cur.fetchone()["n"])
             if n > 0:
                 return
 
-            with open(SEED_PATH, "r", encoding="utf-8") as f:
-                seed = json.load(f)
+            with open(SEED_PATH, "rb") as f:
+                seed = orjson.loads(f.read())
 
             if not isinstance(seed, list) or len(seed) == 0:
                 return
@@ -150,8 +551,7 @@ def seed_db_if_empty() -> None:
             insert_sql = """
             INSERT INTO climb_logs
               (id, date, environment, location, route_name, climb_type, grade_system, grade, grade_key, progress)
-            VALUES
-              (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES %s
             ON CONFLICT (id) DO NOTHING;
             """
 
@@ -171,41 +571,48 @@ def seed_db_if_empty() -> None:
 
                 rows.append((_id, date_str, env, loc, route, ctype, gsys, grade, gk, prog))
 
-            cur.executemany(insert_sql, rows)
+            # Multi-row VALUES instead of one INSERT per row
+            execute_values(cur, insert_sql, rows, page_size=500)
 
 
-def validate_payload(payload: Dict[str, Any]) -> Dict[str, str]:
+def validate_payload(payload: Dict[str, str]) -> Dict[str, str]:
+    """
+    Validate a payload from _parse_payload_from_request (every LOG_FIELDS value is a stripped str).
+    """
     errors: Dict[str, str] = {}
 
-    required = ["date", "environment", "location", "routeName", "climbType", "gradeSystem", "grade", "progress"]
-    for field in required:
-        if not str(payload.get(field, "")).strip():
+    for field in LOG_FIELDS:
+        if not payload[field]:
             errors[field] = f"{field} is required."
 
-    date_str = str(payload.get("date", "")).strip()
+    date_str = payload["date"]
     if date_str:
-        try:
-            y, m, d = map(int, date_str.split("-"))
-            dt = Date(y, m, d)
-            if dt > Date.today():
-                errors["date"] = "Date cannot be in the future."
-        except Exception:
+        # Shape check first: fromisoformat (C parser) also accepts other ISO 8601 forms
+        if len(date_str) != 10 or date_str[4] != "-" or date_str[7] != "-":
             errors["date"] = "Date must be YYYY-MM-DD."
-
-    env = payload.get("environment")
-    if env and env not in ("gym", "outdoor"):
+        else:
+            try:
+                dt = Date.fromisoformat(date_str)
+            except ValueError:
+                errors["date"] = "Date must be YYYY-MM-DD."
+            else:
+                if dt > Date.today():
+                    errors["date"] = "Date cannot be in the future."
+
+    env = payload["environment"]
+    if env and env not in ENVIRONMENTS:
         errors["environment"] = "Environment must be gym or outdoor."
 
-    ctype = payload.get("climbType")
-    if ctype and ctype not in ("top-rope", "sport", "trad", "boulder"):
+    ctype = payload["climbType"]
+    if ctype and ctype not in CLIMB_TYPES:
         errors["climbType"] = "Invalid climb type."
 
-    prog = payload.get("progress")
-    if prog and prog not in ("complete", "incomplete"):
+    prog = payload["progress"]
+    if prog and prog not in PROGRESS_VALUES:
         errors["progress"] = "Progress must be complete or incomplete."
 
-    gsys = payload.get("gradeSystem")
-    grade = str(payload.get("grade", "")).strip()
+    gsys = payload["gradeSystem"]
+    grade = payload["grade"]
 
     # Your domain rule: boulder -> V, roped -> YDS
     if ctype == "boulder":
@@ -226,22 +633,21 @@ def validate_payload(payload: Dict[str, Any]) -> Dict[str, str]:
     return errors
 
 
+# DB column -> API field mapping, in response order
+_API_ROW_KEYS = ("id", "date", "environment", "location", "routeName", "climbType", "gradeSystem", "grade", "progress")
+_DB_ROW_VALUES = itemgetter(
+    "id", "date", "environment", "location", "route_name", "climb_type", "grade_system", "grade", "progress"
+)
+
+
 def to_api_row(db_row: Dict[str, Any]) -> Dict[str, Any]:
     """
     Convert DB column names to your existing API field names
     """
-    return {
-        "id": db_row["id"],
-        "date": str(db_row["date"]),
-        "environment": db_row["environment"],
-        "location": db_row["location"],
-        "routeName": db_row["route_name"],
-        "climbType": db_row["climb_type"],
-        "gradeSystem": db_row["grade_system"],
-        "grade": db_row["grade"],
-        "progress": db_row["progress"],
-        "hasImage": bool(db_row.get("has_image", False)),
-    }
+    row = dict(zip(_API_ROW_KEYS, _DB_ROW_VALUES(db_row)))
+    row["date"] = str(row["date"])
+    row["hasImage"] = bool(db_row.get("has_image", False))
+    return row
 
 
 def build_where_clauses(
@@ -249,29 +655,36 @@ def build_where_clauses(
     envs: List[str],
     types: List[str],
     progress: List[str],
+    grade_system: Optional[str] = None,
+    before: Optional[Tuple[Date, str]] = None,
 ) -> Tuple[str, List[Any]]:
     clauses = []
     params: List[Any] = []
 
     if q:
-        clauses.append("(route_name ILIKE %s OR location ILIKE %s)")
-        like = f"%{q}%"
-        params.extend([like, like])
+        clauses.append("search_text LIKE lower(%s)")
+        params.append(f"%{q}%")
 
+    # One array parameter per filter keeps the SQL text the same for any number of values
     if envs:
-        placeholders = ",".join(["%s"] * len(envs))
-        clauses.append(f"environment IN ({placeholders})")
-        params.extend(envs)
+        clauses.append("environment = ANY(%s)")
+        params.append(envs)
 
     if types:
-        placeholders = ",".join(["%s"] * len(types))
-        clauses.append(f"climb_type IN ({placeholders})")
-        params.extend(types)
+        clauses.append("climb_type = ANY(%s)")
+        params.append(types)
 
     if progress:
-        placeholders = ",".join(["%s"] * len(progress))
-        clauses.append(f"progress IN ({placeholders})")
-        params.extend(progress)
+        clauses.append("progress = ANY(%s)")
+        params.append(progress)
+
+    if grade_system:
+        clauses.append("grade_system = %s")
+        params.append(grade_system)
+
+    if before:
+        clauses.append("(date, id) < (%s, %s)")
+        params.extend(before)
 
     where_sql = ("WHERE " + " AND ".join(clauses)) if clauses else ""
     return where_sql, params
@@ -282,63 +695,47 @@ def resolve_order_by(sort: str) -> str:
     Allowlist sort options. Never put user input directly in SQL.
     """
     mapping = {
-        "date_desc": "date DESC",
-        "date_asc": "date ASC",
+        "date_desc": "date DESC, id DESC",
+        "date_asc": "date ASC, id ASC",
         "location_asc": "location ASC",
         "location_desc": "location DESC",
         "route_asc": "route_name ASC",
         "route_desc": "route_name DESC",
-        # grade handled separately (requires grade system check)
+        "yds_asc": "grade_key ASC, date DESC",
+        "yds_desc": "grade_key DESC, date DESC",
+        "v_asc": "grade_key ASC, date DESC",
+        "v_desc": "grade_key DESC, date DESC",
+        # grade handled in list_logs (only valid when one grade system is present)
     }
-    return mapping.get(sort, "date DESC")
+    return mapping.get(sort, "date DESC, id DESC")
 
 
-def should_allow_grade_sort(where_sql: str, params: List[Any]) -> Optional[str]:
-    """
-    Returns grade_system ("YDS" or "V") if filtered result set has exactly one system,
-    otherwise returns None.
-    """
-    sql = f"SELECT DISTINCT grade_system FROM climb_logs {where_sql};"
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(sql, params)
-            systems = [r["grade_system"] for r in cur.fetchall()]
-
-    systems = [s for s in systems if s]
-    if len(set(systems)) == 1:
-        return systems[0]
-    return None
+def _clean_str(v: Any) -> str:
+    if isinstance(v, str):
+        return v.strip()
+    return "" if v is None else str(v).strip()
 
 
-def _parse_payload_from_request() -> Dict[str, Any]:
+def _parse_payload_from_request() -> Dict[str, str]:
     """
     Support multipart/form-data (for uploads) and JSON (fallback).
     """
     ctype = (request.content_type or "").lower()
     if ctype.startswith("multipart/form-data") or ctype.startswith("application/x-www-form-urlencoded"):
         f = request.form
-        return {
-            "date": (f.get("date") or "").strip(),
-            "environment": (f.get("environment") or "").strip(),
-            "location": (f.get("location") or "").strip(),
-            "routeName": (f.get("routeName") or "").strip(),
-            "climbType": (f.get("climbType") or "").strip(),
-            "gradeSystem": (f.get("gradeSystem") or "").strip(),
-            "grade": (f.get("grade") or "").strip(),
-            "progress": (f.get("progress") or "").strip(),
-        }
-
-    payload = request.get_json(silent=True) or {}
-    return {
-        "date": str(payload.get("date", "")).strip(),
-        "environment": str(payload.get("environment", "")).strip(),
-        "location": str(payload.get("location", "")).strip(),
-        "routeName": str(payload.get("routeName", "")).strip(),
-        "climbType": str(payload.get("climbType", "")).strip(),
-        "gradeSystem": str(payload.get("gradeSystem", "")).strip(),
-        "grade": str(payload.get("grade", "")).strip(),
-        "progress": str(payload.get("progress", "")).strip(),
-    }
+        return {k: (f.get(k) or "").strip() for k in LOG_FIELDS}
+
+    # Read the body once for orjson; nothing else needs it, so don't keep a cached copy
+    raw = request.get_data(cache=False)
+    try:
+        payload = orjson.loads(raw) if raw else {}
+    except orjson.JSONDecodeError:
+        payload = {}
+    if not isinstance(payload, dict):
+        payload = {}
+
+    # Every value comes back as a stripped str, so handlers can use it as-is
+    return {k: _clean_str(payload.get(k)) for k in LOG_FIELDS}
 
 
 def _process_image_bytes(data: bytes, mime: str) -> Tuple[bytes, str]:
@@ -353,6 +750,15 @@ def _process_image_bytes(data: bytes, mime: str) -> Tuple[bytes, str]:
     if mime == "image/gif":
         return data, mime
 
+    if _fits_without_processing(data, mime):
+        return data, mime
+
+    if pyvips is not None and mime in ("image/jpeg", "image/png"):
+        try:
+            return _vips_thumbnail(data, mime)
+        except Exception:
+            pass  # fall through to Pillow
+
     if Image is None:
         # Pillow isn't available; fall back to storing raw bytes.
         return data, mime
@@ -364,8 +770,7 @@ def _process_image_bytes(data: bytes, mime: str) -> Tuple[bytes, str]:
         if ImageOps is not None:
             im = ImageOps.exif_transpose(im)
 
-        max_side = 800
-        im.thumbnail((max_side, max_side))
+        im.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
 
         out = io.BytesIO()
 
@@ -386,6 +791,60 @@ def _process_image_bytes(data: bytes, mime: str) -> Tuple[bytes, str]:
         return data, mime
 
 
+# Header info keys that only describe encoding/colour; anything else (EXIF, XMP, comments,
+# PNG text chunks) may carry metadata such as GPS, so those uploads go through the re-encode
+_PASSTHROUGH_INFO_KEYS = frozenset((
+    "jfif", "jfif_version", "jfif_unit", "jfif_density", "dpi", "adobe", "adobe_transform",
+    "progressive", "progression", "icc_profile", "gamma", "srgb", "chromaticity", "transparency", "aspect",
+))
+# JPEG APPn segments: JFIF, ICC profile, Adobe colour transform (not every APPn shows up in info)
+_PASSTHROUGH_JPEG_APPS = frozenset(("APP0", "APP2", "APP14"))
+_PASSTHROUGH_FORMATS = {"image/jpeg": "JPEG", "image/png": "PNG"}
+
+
+def _fits_without_processing(data: bytes, mime: str) -> bool:
+    """
+    True for small uploads already within IMAGE_MAX_SIDE, really in the declared format and
+    carrying no metadata beyond _PASSTHROUGH_INFO_KEYS. Image.open only parses the header.
+    """
+    if Image is None or len(data) >= IMAGE_PASSTHROUGH_BYTES:
+        return False
+    try:
+        im = Image.open(io.BytesIO(data))
+        return (
+            im.format == _PASSTHROUGH_FORMATS.get(mime)
+            and max(im.size) <= IMAGE_MAX_SIDE
+            and _PASSTHROUGH_INFO_KEYS.issuperset(im.info)
+            and _PASSTHROUGH_JPEG_APPS.issuperset(marker for marker, _ in getattr(im, "applist", ()))
+        )
+    except Exception:
+        return False
+
+
+def _vips_thumbnail(data: bytes, mime: str) -> Tuple[bytes, str]:
+    """
+    Same output rules as the Pillow path, via libvips: shrink-on-load decode,
+    EXIF auto-rotate, never upscale (size="down"), metadata stripped.
+    """
+    im = pyvips.Image.thumbnail_buffer(data, IMAGE_MAX_SIDE, height=IMAGE_MAX_SIDE, size="down")
+    if mime == "image/jpeg":
+        if im.hasalpha():
+            im = im.flatten(background=255)
+        return im.write_to_buffer(".jpg", Q=80, optimize_coding=True, interlace=True, keep="none"), "image/jpeg"
+    return im.write_to_buffer(".png", compression=9, keep="none"), "image/png"
+
+
+def _image_etag(data: bytes) -> str:
+    # Strong cache key based on bytes (fast + stable)
+    return hashlib.sha1(data).hexdigest()
+
+
+def _iter_chunks(buf: memoryview) -> Iterator[bytes]:
+    # WSGI needs bytes; copy one chunk at a time rather than the whole image up front
+    for i in range(0, len(buf), IMAGE_CHUNK_BYTES):
+        yield bytes(buf[i:i + IMAGE_CHUNK_BYTES])
+
+
 def _read_and_validate_image_file() -> Tuple[Optional[bytes], Optional[str], Optional[str], Optional[Dict[str, str]]]:
     """
     Return (bytes, mime, filename, errors).
@@ -410,41 +869,143 @@ def _read_and_validate_image_file() -> Tuple[Optional[bytes], Optional[str], Opt
     if len(data) > MAX_IMAGE_BYTES:
         return None, None, None, {"image": "Image is too large. Max size is 5 MB."}
 
-    # Resize/compress (best-effort) to reduce payload before storing
-    data, mime = _process_image_bytes(data, mime)
-
+    # Stored as uploaded; resize/compress happens after the response (see _schedule_image_processing)
     return data, mime, filename, None
 
 
-# ----------------------------
-# Startup: ensure table + seed
-# ----------------------------
+def _initial_image_status(data: bytes, mime: str) -> str:
+    # GIFs, uploads that already fit, and anything when no image library is installed are stored as final
+    if mime == "image/gif" or (pyvips is None and Image is None) or _fits_without_processing(data, mime):
+        return "ready"
+    return "pending"
+
+
+_IMAGE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_IMAGE_JOBS: set = set()  # (log_id, etag) queued or running in this process
+_IMAGE_LOCK = threading.Lock()
+_PENDING_SWEPT = False  # pending-row sweep started in this process
+
+
+def _schedule_image_processing(log_id: str, etag: str) -> None:
+    """
+    Queue a background resize of a stored upload. The executor is created on first use,
+    inside the serving process (never in gunicorn's master before it forks).
+    """
+    job = (log_id, etag)
+    with _IMAGE_LOCK:
+        if job in _IMAGE_JOBS:
+            return
+        _IMAGE_JOBS.add(job)
+        executor = _image_executor()
+    executor.submit(_process_stored_image, log_id, etag)
+
+
+def _image_executor() -> ThreadPoolExecutor:
+    # Caller holds _IMAGE_LOCK
+    global _IMAGE_EXECUTOR
+    if _IMAGE_EXECUTOR is None:
+        _IMAGE_EXECUTOR = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image")
+    return _IMAGE_EXECUTOR
+
+
 @app.before_request
-def _ensure_db_ready():
-    # Run once per instance (cheap guard)
-    if not getattr(app, "_db_ready", False):
-        init_db()
-        seed_db_if_empty()
-        app._db_ready = True
+def _sweep_pending_images_once():
+    # First request in each worker queues the resizes a restart dropped; after that, one flag check
+    global _PENDING_SWEPT
+    if _PENDING_SWEPT or not _DB_READY:
+        return None
+    with _IMAGE_LOCK:
+        if _PENDING_SWEPT:
+            return None
+        _PENDING_SWEPT = True
+        _image_executor().submit(_requeue_pending_images)
+    return None
+
+
+def _requeue_pending_images() -> None:
+    """
+    Queue every stored upload still marked pending (raw originals left by a restart).
+    """
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, image_etag FROM climb_logs WHERE image_status = 'pending';")
+                rows = cur.fetchall()
+    except Exception:
+        app.logger.exception("Pending image sweep failed")
+        return
+    for row in rows:
+        if row["image_etag"]:
+            _schedule_image_processing(row["id"], row["image_etag"])
+
+
+def _process_stored_image(log_id: str, etag: str) -> None:
+    """
+    Resize a pending upload and swap it in, unless the row's image was replaced
+    or removed meanwhile (its etag no longer matches).
+    """
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT image_data, image_mime FROM climb_logs WHERE id=%s AND image_etag=%s;",
+                    [log_id, etag],
+                )
+                row = cur.fetchone()
+        if not row:
+            return
+
+        data, mime = _process_image_bytes(bytes(row["image_data"]), row["image_mime"])
+
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE climb_logs
+                    SET image_data=%s, image_mime=%s, image_etag=%s, image_status='ready'
+                    WHERE id=%s AND image_etag=%s;
+                    """,
+                    [data, mime, _image_etag(data), log_id, etag],
+                )
+    except Exception:
+        app.logger.exception("Image processing failed for log %s", log_id)
+    finally:
+        with _IMAGE_LOCK:
+            _IMAGE_JOBS.discard((log_id, etag))
 
 
 # ----------------------------
 # Routes
 # ----------------------------
+# Constant bodies, encoded once at import
+_ROOT_BODY = orjson.dumps({"health": "/api/health", "message": "Climbing Log API is running"})
+_HEALTH_BODY = b'{"ok":true}'
+
+
 @app.get("/")
 def root():
-    return jsonify({"health": "/api/health", "message": "Climbing Log API is running"})
+    return Response(_ROOT_BODY, mimetype="application/json")
 
 
 @app.get("/api/health")
 def health():
-    return jsonify({"ok": True})
+    # Constant body; load balancer probes should not touch the DB or the encoder
+    return Response(_HEALTH_BODY, mimetype="application/json")
+
+
+# Row count of climb_logs from the per-type counters (see init_db), as column n
+_COUNTED_TOTAL_SQL = "SELECT COALESCE(SUM(total), 0) AS n FROM climb_log_type_counts"
 
 
 @app.get("/api/logs")
 def list_logs():
-    page = int(request.args.get("page", "1"))
-    page_size = int(request.args.get("pageSize", str(PAGE_SIZE_DEFAULT)))
+    cache_key = _cache_key()
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
+    page = _int_arg("page", 1)
+    page_size = _int_arg("pageSize", PAGE_SIZE_DEFAULT)
     q = (request.args.get("q") or "").strip()
 
     envs = _parse_csv(request.args.get("env"))
@@ -459,89 +1020,164 @@ def list_logs():
     if page_size > PAGE_SIZE_MAX:
         page_size = PAGE_SIZE_MAX
 
-    where_sql, params = build_where_clauses(q.lower(), envs, types, progress)
+    # Keyset pagination (date_desc only): ?cursor=<date>|<id> from a previous nextCursor.
+    # Seeks on the (date, id) index instead of discarding OFFSET rows; page is ignored.
+    after: Optional[Tuple[Date, str]] = None
+    cursor_arg = (request.args.get("cursor") or "").strip()
+    if cursor_arg and sort == "date_desc":
+        after = _parse_cursor(cursor_arg)
+        if after is None:
+            return jsonify({"message": "Invalid cursor"}), 400
 
-    # Total count
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(f"SELECT COUNT(*) AS n FROM climb_logs {where_sql};", params)
-            total = int(cur.fetchone()["n"])
+    where_sql, params = build_where_clauses(
+        q, envs, types, progress, GRADE_SORT_SYSTEMS.get(sort), after
+    )
 
     # Sort logic
     if sort in ("grade_asc", "grade_desc"):
-        sys = should_allow_grade_sort(where_sql, params)
-        if sys in ("YDS", "V"):
-            order_by = f"grade_key {'ASC' if sort == 'grade_asc' else 'DESC'}"
-        else:
-            order_by = "date DESC"
+        # Grade keys only compare within one system; mixed results fall back to date DESC.
+        # The check is a window over the filtered rows, so the WHERE runs once, not twice.
+        order_by = (
+            "CASE WHEN MIN(grade_system) OVER () = MAX(grade_system) OVER () "
+            f"THEN grade_key END {'ASC' if sort == 'grade_asc' else 'DESC'} NULLS LAST, date DESC"
+        )
     else:
         order_by = resolve_order_by(sort)
 
-    offset = (page - 1) * page_size
+    if after is None and not where_sql:
+        # Unfiltered: exact total from the trigger-kept counters. With no window to feed,
+        # Postgres can stop after LIMIT + OFFSET rows of the sort index.
+        total_sql = f"({_COUNTED_TOTAL_SQL}) AS total_count"
+        limit_sql = "LIMIT %s OFFSET %s"
+        limit_params = [page_size, (page - 1) * page_size]
+    elif after is None:
+        # Total rides along with the page via a window count (one round trip)
+        total_sql = "COUNT(*) OVER() AS total_count"
+        limit_sql = "LIMIT %s OFFSET %s"
+        limit_params = [page_size, (page - 1) * page_size]
+    else:
+        # A window count would scan every row past the cursor; cursor pages carry no total
+        total_sql = "NULL AS total_count"
+        limit_sql = "LIMIT %s"
+        limit_params = [page_size]
 
     sql = f"""
     SELECT
       id, date, environment, location, route_name, climb_type, grade_system, grade, progress,
-      (image_mime IS NOT NULL) AS has_image
+      (image_mime IS NOT NULL) AS has_image,
+      {total_sql}
     FROM climb_logs
     {where_sql}
     ORDER BY {order_by}
-    LIMIT %s OFFSET %s;
+    {limit_sql};
     """
 
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, params + [page_size, offset])
-            rows = cur.fetchall()
-
-    items = [to_api_row(r) for r in rows]
-    return jsonify({"items": items, "total": total, "page": page, "pageSize": page_size})
+            cur.execute(sql, params + limit_params)
+
+            # Convert rows as they are read instead of materializing fetchall() first
+            items = []
+            total: Optional[int] = 0 if after is None else None
+            for r in cur:
+                if not items and after is None:
+                    total = int(r["total_count"])
+                items.append(to_api_row(r))
+
+            if not items and page > 1 and after is None:
+                # Page past the end: the total had no row to ride on
+                if where_sql:
+                    cur.execute(f"SELECT COUNT(*) AS n FROM climb_logs {where_sql};", params)
+                else:
+                    cur.execute(f"{_COUNTED_TOTAL_SQL};")
+                total = int(cur.fetchone()["n"])
+
+    next_cursor = None
+    if sort == "date_desc" and len(items) == page_size:
+        last = items[-1]
+        next_cursor = f"{last['date']}|{last['id']}"
+
+    resp = {
+        "items": items,
+        "total": total,
+        "page": page if after is None else None,
+        "pageSize": page_size,
+        "nextCursor": next_cursor,
+    }
+    _cache_put(cache_key, resp)
+    return jsonify(resp)
 
 
 @app.get("/api/logs/<log_id>")
 def get_log(log_id: str):
-    sql = """
-    SELECT
-      id, date, environment, location, route_name, climb_type, grade_system, grade, progress,
-      (image_mime IS NOT NULL) AS has_image
-    FROM climb_logs
-    WHERE id = %s;
-    """
+    cache_key = _cache_key()
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, [log_id])
+            execute_prepared(cur, "get_log_ps", [log_id])
             row = cur.fetchone()
 
     if not row:
         return jsonify({"message": "Not found"}), 404
-    return jsonify(to_api_row(row))
+    resp = to_api_row(row)
+    _cache_put(cache_key, resp)
+    return jsonify(resp)
+
+
+_IMAGE_CACHE_READY = "public, max-age=604800"  # 7 days
+_IMAGE_CACHE_PENDING = "no-cache"
 
 
 @app.get("/api/logs/<log_id>/image")
 def get_log_image(log_id: str):
-    sql = "SELECT image_data, image_mime FROM climb_logs WHERE id=%s;"
+    inm = (request.headers.get("If-None-Match") or "").strip()
+    row = None
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, [log_id])
-            row = cur.fetchone()
-
-    if not row or not row.get("image_data") or not row.get("image_mime"):
+            # Two passes at most: the data read is pinned to the metadata's ETag, so a resize that
+            # lands in between returns no row and the second pass picks up the new image
+            for _ in range(2):
+                # Metadata first: a revalidation hit answers 304 without touching image_data
+                execute_prepared(cur, "image_meta_ps", [log_id])
+                meta = cur.fetchone()
+                if not meta or not meta["image_mime"]:
+                    return jsonify({"message": "No image"}), 404
+
+                etag = meta["image_etag"]
+                # A pending original is replaced in place (new ETag) once the resize lands, so it is
+                # revalidated on every use; only the final ready image gets the long browser cache
+                cache_control = _IMAGE_CACHE_PENDING if meta["image_status"] == "pending" else _IMAGE_CACHE_READY
+                if etag and meta["image_status"] == "pending":
+                    # Original is served until the resize lands; requeue in case the job was lost (restart)
+                    _schedule_image_processing(log_id, etag)
+                if etag and inm == etag:
+                    return Response(status=304, headers={
+                        "ETag": etag,
+                        "Cache-Control": cache_control,
+                    })
+
+                execute_prepared(cur, "image_data_ps", [log_id, etag])
+                row = cur.fetchone()
+                if row:
+                    break
+
+    if not row or not row["image_data"]:
         return jsonify({"message": "No image"}), 404
 
     img_bytes = row["image_data"]
-    img_mime = row["image_mime"]
-
-    # Strong cache key based on bytes (fast + stable)
-    etag = hashlib.sha1(img_bytes).hexdigest()
-    inm = (request.headers.get("If-None-Match") or "").strip()
-    if inm == etag:
-        return Response(status=304, headers={
-            "ETag": etag,
-            "Cache-Control": "public, max-age=604800",  # 7 days
-        })
-
-    resp = Response(img_bytes, mimetype=img_mime)
-    resp.headers["Cache-Control"] = "public, max-age=604800"  # 7 days
+    img_mime = meta["image_mime"]
+    if not etag:
+        # Row written before image_etag existed and not yet backfilled
+        etag = _image_etag(img_bytes)
+
+    # psycopg2 hands BYTEA back as a memoryview over the fetched buffer
+    img_view = memoryview(img_bytes)
+    resp = Response(_iter_chunks(img_view), mimetype=img_mime, direct_passthrough=True)
+    resp.content_length = len(img_view)
+    resp.headers["Cache-Control"] = cache_control
     resp.headers["ETag"] = etag
     return resp
 
@@ -559,30 +1195,32 @@ def create_log():
         return jsonify({"errors": errors, "message": "Validation failed"}), 400
 
     new_id = str(uuid.uuid4())
-    date_str = str(payload["date"]).strip()
-    env = str(payload["environment"]).strip()
-    loc = str(payload["location"]).strip()
-    route = str(payload["routeName"]).strip()
-    ctype = str(payload["climbType"]).strip()
-    gsys = str(payload["gradeSystem"]).strip()
-    grade = str(payload["grade"]).strip()
-    prog = str(payload["progress"]).strip()
+    date_str = payload["date"]
+    env = payload["environment"]
+    loc = payload["location"]
+    route = payload["routeName"]
+    ctype = payload["climbType"]
+    gsys = payload["gradeSystem"]
+    grade = payload["grade"]
+    prog = payload["progress"]
 
     gk = _grade_key(gsys, grade)
 
-    insert_sql = """
-    INSERT INTO climb_logs
-      (id, date, environment, location, route_name, climb_type, grade_system, grade, grade_key, progress,
-       image_data, image_mime, image_filename)
-    VALUES
-      (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
-    """
+    img_etag = _image_etag(img_bytes) if img_bytes is not None else None
+    img_status = _initial_image_status(img_bytes, img_mime) if img_etag else None
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                insert_sql,
-                [new_id, date_str, env, loc, route, ctype, gsys, grade, gk, prog, img_bytes, img_mime, img_filename],
+            execute_prepared(
+                cur,
+                "insert_log_ps",
+                [
+                    new_id, date_str, env, loc, route, ctype, gsys, grade, gk, prog,
+                    img_bytes, img_mime, img_filename, img_etag, img_status,
+                ],
             )
+    _bump_data_version()
+    if img_status == "pending":
+        _schedule_image_processing(new_id, img_etag)
 
     return jsonify({
         "id": new_id,
@@ -619,31 +1257,36 @@ def update_log(log_id: str):
     if errors:
         return jsonify({"errors": errors, "message": "Validation failed"}), 400
 
-    date_str = str(payload["date"]).strip()
-    env = str(payload["environment"]).strip()
-    loc = str(payload["location"]).strip()
-    route = str(payload["routeName"]).strip()
-    ctype = str(payload["climbType"]).strip()
-    gsys = str(payload["gradeSystem"]).strip()
-    grade = str(payload["grade"]).strip()
-    prog = str(payload["progress"]).strip()
+    date_str = payload["date"]
+    env = payload["environment"]
+    loc = payload["location"]
+    route = payload["routeName"]
+    ctype = payload["climbType"]
+    gsys = payload["gradeSystem"]
+    grade = payload["grade"]
+    prog = payload["progress"]
 
     gk = _grade_key(gsys, grade)
 
     img_set_sql = ""
     img_params: List[Any] = []
+    img_etag: Optional[str] = None
+    img_status: Optional[str] = None
     if remove_image:
-        img_set_sql = ", image_data=NULL, image_mime=NULL, image_filename=NULL"
+        img_set_sql = ", image_data=NULL, image_mime=NULL, image_filename=NULL, image_etag=NULL, image_status=NULL"
     elif img_mime and img_bytes is not None:
-        img_set_sql = ", image_data=%s, image_mime=%s, image_filename=%s"
-        img_params.extend([img_bytes, img_mime, img_filename])
+        img_etag = _image_etag(img_bytes)
+        img_status = _initial_image_status(img_bytes, img_mime)
+        img_set_sql = ", image_data=%s, image_mime=%s, image_filename=%s, image_etag=%s, image_status=%s"
+        img_params.extend([img_bytes, img_mime, img_filename, img_etag, img_status])
 
     sql = f"""
     UPDATE climb_logs
     SET date=%s, environment=%s, location=%s, route_name=%s,
         climb_type=%s, grade_system=%s, grade=%s, grade_key=%s, progress=%s
         {img_set_sql}
-    WHERE id=%s;
+    WHERE id=%s
+    RETURNING (image_mime IS NOT NULL) AS has_image;
     """
 
     base_params: List[Any] = [date_str, env, loc, route, ctype, gsys, grade, gk, prog]
@@ -652,11 +1295,13 @@ def update_log(log_id: str):
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(sql, params)
-            if cur.rowcount == 0:
+            row = cur.fetchone()
+            if row is None:
                 return jsonify({"message": "Not found"}), 404
-
-            cur.execute("SELECT (image_mime IS NOT NULL) AS has_image FROM climb_logs WHERE id=%s;", [log_id])
-            has_image = bool(cur.fetchone()["has_image"])
+            has_image = bool(row["has_image"])
+    _bump_data_version()
+    if img_status == "pending":
+        _schedule_image_processing(log_id, img_etag)
 
     return jsonify({
         "id": log_id,
@@ -676,31 +1321,88 @@ def update_log(log_id: str):
 def delete_log(log_id: str):
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute("DELETE FROM climb_logs WHERE id=%s;", [log_id])
+            execute_prepared(cur, "delete_log_ps", [log_id])
             if cur.rowcount == 0:
                 return jsonify({"message": "Not found"}), 404
+    _bump_data_version()
     return jsonify({"ok": True})
 
 
 @app.get("/api/stats")
 def stats():
+    cache_key = _cache_key()
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute("SELECT COUNT(*) AS total FROM climb_logs;")
-            total = int(cur.fetchone()["total"])
+            # A handful of counter rows (one per climb type), kept by climb_logs_count
+            cur.execute(
+                "SELECT climb_type, total, complete FROM climb_log_type_counts "
+                "WHERE total > 0 ORDER BY climb_type;"
+            )
+            rows = cur.fetchall()
 
-            cur.execute("SELECT COUNT(*) AS complete FROM climb_logs WHERE progress='complete';")
-            complete = int(cur.fetchone()["complete"])
+    by_type = {r["climb_type"]: int(r["total"]) for r in rows}
+    total = sum(by_type.values())
+    complete = sum(int(r["complete"]) for r in rows)
+    pct = int(round((complete / total) * 100)) if total else 0
 
-            cur.execute("SELECT climb_type, COUNT(*) AS n FROM climb_logs GROUP BY climb_type ORDER BY climb_type;")
-            by_type_rows = cur.fetchall()
+    resp = {"total": total, "completionRate": pct, "byType": by_type}
+    _cache_put(cache_key, resp)
+    return jsonify(resp)
+
+
+# ----------------------------
+# Startup: ensure table + seed (at import; retried on request if the database was down)
+# ----------------------------
+_DB_READY = SKIP_DB_INIT
+_DB_INIT_LOCK = threading.Lock()
+_DB_INIT_RETRY_SECONDS = 5.0
+_db_init_next_try = 0.0
+
+
+def _try_init_db() -> bool:
+    """
+    Run schema setup + seed once; on failure log it and leave _DB_READY unset for a retry.
+    """
+    global _DB_READY
+    try:
+        init_db()
+        seed_db_if_empty()
+    except (psycopg2.OperationalError, RuntimeError) as e:
+        app.logger.warning("Database init failed (will retry on next request): %s", e)
+        return False
+    _DB_READY = True
+    return True
+
+
+@app.before_request
+def _ensure_db_ready():
+    # Import-time init failed (database down during deploy/preload): retry here, one thread at a
+    # time and at most every few seconds, instead of serving against a missing schema forever.
+    # Probes skip it, and requests arriving mid-retry get 503 at once instead of queueing.
+    global _db_init_next_try
+    if _DB_READY or request.endpoint in ("health", "root"):
+        return None
+    if _DB_INIT_LOCK.acquire(blocking=False):
+        try:
+            if not _DB_READY and time.monotonic() >= _db_init_next_try:
+                if not _try_init_db():
+                    _db_init_next_try = time.monotonic() + _DB_INIT_RETRY_SECONDS
+        finally:
+            _DB_INIT_LOCK.release()
+    if not _DB_READY:
+        return jsonify({"message": "Database unavailable"}), 503
+    return None
 
-    pct = int(round((complete / total) * 100)) if total else 0
-    by_type = {r["climb_type"]: int(r["n"]) for r in by_type_rows}
 
-    return jsonify({"total": total, "completionRate": pct, "byType": by_type})
+if not SKIP_DB_INIT:
+    # Keep the module importable without a database (tooling, missing DATABASE_URL)
+    _try_init_db()
 
 
 if __name__ == "__main__":
     # Local dev only. Render uses gunicorn.
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=5000, debug=os.environ.get("FLASK_DEBUG", "").strip().lower() in ("1", "true"))
\ No newline at end of file
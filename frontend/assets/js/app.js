@@ -76,6 +76,9 @@ const gradeEl = document.getElementById("grade");
 // Allowed grade lists
 const YDS_GRADES = ["5.2","5.3","5.4","5.5","5.6","5.7","5.8","5.9","5.10","5.11","5.12","5.13","5.14","5.15"];
 const V_GRADES = Array.from({ length: 18 }, (_, i) => `V${i}`); // V0..V17
+// Sets for membership checks; the arrays keep display order for the grade select
+const YDS_GRADE_SET = new Set(YDS_GRADES);
+const V_GRADE_SET = new Set(V_GRADES);
 
 function setGradeOptions({ climbType, gradeSystem, selected = "" }) {
   if (!gradeEl) return;
@@ -198,6 +201,14 @@ function canGradeSortFromTypeFilters(types) {
   return (hasBoulder && !hasNonBoulder) || (!hasBoulder && hasNonBoulder);
 }
 
+// Grade sorts map to an explicit per-system sort so the server can filter by grade system
+function resolveGradeSort(sort, types) {
+  if (sort !== "grade_asc" && sort !== "grade_desc") return sort;
+  if (!canGradeSortFromTypeFilters(types)) return sort;
+  const prefix = types.includes("boulder") ? "v" : "yds";
+  return `${prefix}_${sort === "grade_asc" ? "asc" : "desc"}`;
+}
+
 function updateSortSelectAvailability() {
   if (!sortSelect) return;
 
@@ -345,7 +356,7 @@ async function rerender() {
     envs: pageState.filters.envs,
     types: pageState.filters.types,
     progress: pageState.filters.progress,
-    sort: pageState.sort,
+    sort: resolveGradeSort(pageState.sort, pageState.filters.types),
   });
 
   pageState.items = list.items;
@@ -495,11 +506,11 @@ function validate(p) {
   }
 
   if (p.climbType === "boulder") {
-    if (p.gradeSystem === "V" && p.grade && !V_GRADES.includes(p.grade)) {
+    if (p.gradeSystem === "V" && p.grade && !V_GRADE_SET.has(p.grade)) {
       err.grade = "Bouldering grades must be between V0 and V17.";
     }
   } else {
-    if (p.gradeSystem === "YDS" && p.grade && !YDS_GRADES.includes(p.grade)) {
+    if (p.gradeSystem === "YDS" && p.grade && !YDS_GRADE_SET.has(p.grade)) {
       err.grade = "Roped climb grades must be between 5.2 and 5.15.";
     }
   }